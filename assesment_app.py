@@ -15,19 +15,23 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QSplitter,
     QSizePolicy,
+    QStackedWidget,
+    QAbstractScrollArea,
 )
-from PyQt6.QtGui import QTextCharFormat, QBrush, QColor, QFont
-from PyQt6.QtCore import QDate, Qt
+from PyQt6.QtGui import QTextCharFormat, QBrush, QColor, QFont, QPainter
+from PyQt6.QtCore import QDate, Qt, QTimer, QRect, pyqtSignal
 
-from extractdata import extract_to_json
+from extractdata import extract_to_json, is_current, atomic_write
 
 import os
 import sys
 import json
+import html
 from pathlib import Path
 import importlib.util
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date, timedelta
 
 
 # Directories and File locations
@@ -51,7 +55,7 @@ CLASS_COLORS = {
     "History": "#dc143c",
     "IT": "#03a062",
     "Human Biology": "#9fe2bf",
-    "Exersise Science": "#009e4f",
+    "Exercise Science": "#009e4f",
     "Physics": "#ffff00",
     "Design Tech": "#a52a2a",
     "Visual Arts": "#FF8C00",
@@ -80,9 +84,19 @@ Y12_COLS = {
 # universal columns
 FIXED_COLUMNS = ["Week", "Day", "Date", "Events"]
 
+# Rows rendered per event loop tick when prefetching details
+PREFETCH_BATCH = 50
+
+# Heatmap colours from no assessments to the busiest day
+HEAT_LOW = QColor("#f4f4f4")
+HEAT_HIGH = QColor("#c0392b")
+
 # Run extractor
 def run_extractor(path: str):
 
+    # Reuse the last good snapshot if the workbook hasn't changed since it was extracted.
+    if is_current(path, DATA_DIR):
+        return
     extract_to_json(path,DATA_DIR)
 
 
@@ -115,6 +129,132 @@ def read_data(year: int) -> pd.DataFrame:
     return out.dropna(subset=["Date"]) # crash if don't 
 
 
+def render_details(row) -> str:
+    # Escape everything since the text comes straight from whatever teachers typed in the sheet.
+    fields = ["Class", "Task", "Type", "Weighting", "Notes", "Events"]
+    return "<br>".join(f"<b>{f}:</b> {html.escape(str(row[f]))}" for f in fields)
+
+
+def daily_counts(df: pd.DataFrame) -> tuple:
+    """Count tasks per day, starting on the Monday on or before the first date.
+
+    Returns the start date and an array padded to whole weeks, so index
+    ``week * 7 + weekday`` is the count for that day.
+    """
+    if df.empty:
+        return None, np.zeros(0, dtype=int)
+    days = pd.to_datetime(df["Date"], errors="coerce").dropna().values.astype("datetime64[D]")
+    if len(days) == 0:
+        return None, np.zeros(0, dtype=int)
+    first = days.min()
+    # 1970-01-01 was a Thursday, so this gives Monday = 0.
+    start = first - (first.astype(int) + 3) % 7
+    counts = np.bincount((days - start).astype(int))
+    weeks = -(-len(counts) // 7)
+    counts = np.pad(counts, (0, weeks * 7 - len(counts)))
+    return start.astype(date), counts
+
+
+class LoadHeatmap(QAbstractScrollArea):
+    """Year overview with one row per week, shaded by the number of tasks each day.
+
+    Only the rows inside the viewport are painted, so a full school year (or
+    several) scrolls as cheaply as a single month.
+    """
+
+    dateClicked = pyqtSignal(QDate)
+
+    CELL = 22
+    LABEL_W = 70
+    HEADER_H = 20
+
+    def __init__(self):
+        super().__init__()
+        self.start = None
+        self.counts = np.zeros(0, dtype=int)
+        self.colors = [HEAT_LOW]
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+    def set_counts(self, start, counts: np.ndarray):
+        self.start = start
+        self.counts = counts
+        # Pre-build one colour per possible count so painting is just a lookup.
+        top = int(counts.max()) if len(counts) else 0
+        self.colors = [HEAT_LOW]
+        for n in range(1, top + 1):
+            t = n / top
+            self.colors.append(QColor(
+                round(HEAT_LOW.red() + (HEAT_HIGH.red() - HEAT_LOW.red()) * t),
+                round(HEAT_LOW.green() + (HEAT_HIGH.green() - HEAT_LOW.green()) * t),
+                round(HEAT_LOW.blue() + (HEAT_HIGH.blue() - HEAT_LOW.blue()) * t),
+            ))
+        self.update_scroll_range()
+        self.viewport().update()
+
+    def rows(self) -> int:
+        return len(self.counts) // 7
+
+    def cell_width(self) -> int:
+        return max(self.CELL, (self.viewport().width() - self.LABEL_W) // 7)
+
+    def update_scroll_range(self):
+        total = self.HEADER_H + self.rows() * self.CELL
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, total - self.viewport().height()))
+        bar.setPageStep(self.viewport().height())
+        bar.setSingleStep(self.CELL)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        if self.start is None:
+            painter.drawText(self.viewport().rect(), Qt.AlignmentFlag.AlignCenter, "No tasks loaded")
+            return
+
+        cw = self.cell_width()
+        scroll = self.verticalScrollBar().value()
+        height = self.viewport().height()
+
+        # Work out which week rows are actually on screen and paint only those.
+        first = max(0, (scroll - self.HEADER_H) // self.CELL)
+        last = min(self.rows(), (scroll + height) // self.CELL + 1)
+        for row in range(first, last):
+            y = self.HEADER_H + row * self.CELL - scroll
+            week_start = self.start + timedelta(weeks=row)
+            for col in range(7):
+                n = int(self.counts[row * 7 + col])
+                day = week_start + timedelta(days=col)
+                rect = QRect(self.LABEL_W + col * cw, y, cw - 2, self.CELL - 2)
+                painter.fillRect(rect, self.colors[min(n, len(self.colors) - 1)])
+                painter.drawText(rect.adjusted(3, 0, 0, 0), Qt.AlignmentFlag.AlignVCenter, str(day.day))
+            # Label the week a month starts in, plus the top row so the month is always visible.
+            week_end = week_start + timedelta(days=6)
+            if week_end.day <= 7 or row == first:
+                label = (week_end if week_end.day <= 7 else week_start).strftime("%b %Y")
+                painter.drawText(QRect(0, y, self.LABEL_W - 4, self.CELL), Qt.AlignmentFlag.AlignVCenter, label)
+
+        # Weekday header stays pinned over the scrolled rows.
+        painter.fillRect(QRect(0, 0, self.viewport().width(), self.HEADER_H), self.palette().window())
+        for col, name in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+            rect = QRect(self.LABEL_W + col * cw, 0, cw, self.HEADER_H)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, name)
+
+    def mousePressEvent(self, event):
+        if self.start is None:
+            return
+        pos = event.position().toPoint()
+        col = (pos.x() - self.LABEL_W) // self.cell_width()
+        row = (pos.y() + self.verticalScrollBar().value() - self.HEADER_H) // self.CELL
+        if pos.y() < self.HEADER_H or not (0 <= col < 7 and 0 <= row < self.rows()):
+            return
+        day = self.start + timedelta(days=row * 7 + col)
+        self.dateClicked.emit(QDate(day.year, day.month, day.day))
+
+
 # Main App
 class AssessmentApp(QMainWindow):
 
@@ -132,6 +272,10 @@ class AssessmentApp(QMainWindow):
         # DataFrame holding all filtered rows for the chosen year and classes.
         self.df = pd.DataFrame()
 
+        # Pre-rendered details HTML keyed by task ID (the row index in self.df).
+        self.details_cache = {}
+        self._prefetch_queue = []
+
         self.outer_split = QSplitter(Qt.Orientation.Horizontal)
         self.setCentralWidget(self.outer_split)
 
@@ -195,7 +339,10 @@ class AssessmentApp(QMainWindow):
         top = QHBoxLayout()
         self.btn_toggle_setup = QPushButton("Setup")
         top.addWidget(self.btn_toggle_setup)
-        top.addStretch()  # keep the button on the left
+        self.btn_overview = QPushButton("Year Overview")
+        self.btn_overview.setCheckable(True)
+        top.addWidget(self.btn_overview)
+        top.addStretch()  # keep the buttons on the left
         main_v.addLayout(top)
 
         # Inner splitter to place calendar and date sidebar side by side.
@@ -208,7 +355,12 @@ class AssessmentApp(QMainWindow):
         self.calendar = QCalendarWidget()
         self.calendar.setHorizontalHeaderFormat(QCalendarWidget.HorizontalHeaderFormat.NoHorizontalHeader)
         self.calendar.setVerticalHeaderFormat(QCalendarWidget.VerticalHeaderFormat.NoVerticalHeader)
-        cal_v.addWidget(self.calendar)
+        # The month calendar and the year heatmap share the same spot.
+        self.heatmap = LoadHeatmap()
+        self.cal_stack = QStackedWidget()
+        self.cal_stack.addWidget(self.calendar)
+        self.cal_stack.addWidget(self.heatmap)
+        cal_v.addWidget(self.cal_stack)
         self.date_label = QLabel("No date selected")
         cal_v.addWidget(self.date_label)
 
@@ -232,6 +384,8 @@ class AssessmentApp(QMainWindow):
 
         # Connect main-area signals.
         self.btn_toggle_setup.clicked.connect(self.toggle_setup_panel)
+        self.btn_overview.toggled.connect(self.toggle_overview)
+        self.heatmap.dateClicked.connect(self.on_heatmap_clicked)
         self.calendar.selectionChanged.connect(self.on_calendar_selected)
         self.calendar.currentPageChanged.connect(self.populate_date_sidebar)
         self.date_list.itemClicked.connect(self.on_date_sidebar_clicked)
@@ -244,6 +398,16 @@ class AssessmentApp(QMainWindow):
         else:
             self.outer_split.setSizes([0, 1])
 
+    def toggle_overview(self, on: bool):
+        self.cal_stack.setCurrentWidget(self.heatmap if on else self.calendar)
+
+    def on_heatmap_clicked(self, qd: QDate):
+        # Jump back to the month view on the clicked day.
+        self.calendar.setCurrentPage(qd.year(), qd.month())
+        self.calendar.setSelectedDate(qd)
+        self.btn_overview.setChecked(False)
+        self.on_calendar_selected()
+
     def choose_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Choose Excel", "", "Excel Files (*.xlsx *.xls)")
         if path:
@@ -285,6 +449,9 @@ class AssessmentApp(QMainWindow):
         else:
             # If no classes are selected, show nothing. Otherwise filter down.
             self.df = df[df["Class"].isin(self.classes)] if self.classes else pd.DataFrame()
+        self.details_cache = {}
+        self._prefetch_queue = []
+        self.heatmap.set_counts(*daily_counts(self.df))
         self.paint_calendar()
         self.populate_date_sidebar()
         self.on_calendar_selected()
@@ -325,6 +492,7 @@ class AssessmentApp(QMainWindow):
         # Keep only rows in that month, then list unique dates.
         mask = self.df["Date"].str.slice(0, 7) == f"{year:04d}-{month:02d}"
         dates_in_month = sorted(self.df.loc[mask, "Date"].unique())
+        self.prefetch_details(self.df.index[mask])
         for d in dates_in_month:
             self.date_list.addItem(QListWidgetItem(d))
         # Try to keep the sidebar selection in sync with the calendar selection.
@@ -359,10 +527,10 @@ class AssessmentApp(QMainWindow):
         day = self.df[self.df["Date"] == date].copy()
         day = day.sort_values(["Class", "Task"])  # simple, predictable sort
         self.task_list.clear()
-        for _, r in day.iterrows():
+        for task_id, r in day.iterrows():
             item = QListWidgetItem(f"{r['Class']} — {r['Task']}")
-            # Store the full row on the item so the details panel can read it later.
-            item.setData(Qt.ItemDataRole.UserRole, r.to_dict())
+            # Store the task ID on the item so the details panel can look up its HTML later.
+            item.setData(Qt.ItemDataRole.UserRole, int(task_id))
             # Tint the item with its class colour to make scanning easier.
             col = CLASS_COLORS.get(str(r["Class"]), "#eeeeee")
             item.setBackground(QBrush(QColor(col)))
@@ -376,25 +544,38 @@ class AssessmentApp(QMainWindow):
         else:
             self.details.clear()
 
+    def details_html(self, task_id: int) -> str:
+        text = self.details_cache.get(task_id)
+        if text is None:
+            text = render_details(self.df.loc[task_id])
+            self.details_cache[task_id] = text
+        return text
+
+    def prefetch_details(self, task_ids):
+        # Render the month's details a batch at a time from the event loop so paging stays responsive.
+        self._prefetch_queue = [t for t in task_ids if t not in self.details_cache]
+        if self._prefetch_queue:
+            QTimer.singleShot(0, self._prefetch_step)
+
+    def _prefetch_step(self):
+        batch = self._prefetch_queue[:PREFETCH_BATCH]
+        del self._prefetch_queue[:PREFETCH_BATCH]
+        for task_id in batch:
+            if task_id in self.df.index:
+                self.details_html(task_id)
+        if self._prefetch_queue:
+            QTimer.singleShot(0, self._prefetch_step)
+
     def show_details(self, item: QListWidgetItem):
-        data = item.data(Qt.ItemDataRole.UserRole)
-        html = (
-            f"<b>Class:</b> {data['Class']}<br>"
-            f"<b>Task:</b> {data['Task']}<br>"
-            f"<b>Type:</b> {data['Type']}<br>"
-            f"<b>Weighting:</b> {data['Weighting']}<br>"
-            f"<b>Notes:</b> {data['Notes']}<br>"
-            f"<b>Events:</b> {data['Events']}"
-        )
-        self.details.setHtml(html)
+        task_id = item.data(Qt.ItemDataRole.UserRole)
+        self.details.setHtml(self.details_html(task_id))
 
     def save_user(self):
-        with open(USER_PATH, "w", encoding="utf-8") as f:
-            json.dump({
-                "excel_path": self.excel_path,
-                "year": self.year,
-                "classes": self.classes,
-            }, f, indent=2)
+        atomic_write(USER_PATH, json.dumps({
+            "excel_path": self.excel_path,
+            "year": self.year,
+            "classes": self.classes,
+        }, indent=2))
 
     def load_user(self) -> dict:
         if USER_PATH.exists():
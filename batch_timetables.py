@@ -0,0 +1,152 @@
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from calendar_server import DATA_DIR, YEAR_FILES, load_tasks, find_clashes, to_ics
+from extractdata import CLASS_INDEX
+
+# Students handed to a worker at a time
+BATCH_SIZE = 50
+
+# Filled in once per worker process by init_worker()
+TASKS = {}
+CLASS_TASKS = {}
+OUT_DIR = None
+
+
+def read_roster(path) -> list[dict]:
+    """Read a roster CSV with student, year and classes columns.
+
+    Classes are separated by semicolons, e.g. ``person1,11,English;IT;Chemistry``.
+    """
+    students = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            if not row.get("student"):
+                continue
+            try:
+                year = int(row.get("year", ""))
+            except ValueError:
+                year = None
+            if year not in YEAR_FILES:
+                raise ValueError(f"Bad year for {row['student']}: {row.get('year')!r}")
+            # Rosters are typed by hand too, so run the names through the same normaliser as the extractor.
+            classes = sorted({CLASS_INDEX.lookup(c) for c in row.get("classes", "").split(";") if c.strip()})
+            students.append({"student": row["student"], "year": year, "classes": classes})
+    return students
+
+
+def build_index(data_dir: Path = DATA_DIR) -> tuple[dict, dict]:
+    """Load both years once and index task positions by class.
+
+    Returns ({year: [task, ...]}, {year: {class: frozenset of task positions}}).
+    """
+    tasks = {y: load_tasks(y, data_dir) for y in YEAR_FILES}
+    class_tasks = {}
+    for year, rows in tasks.items():
+        index = {}
+        for i, t in enumerate(rows):
+            # Older snapshots may predate name normalisation, so key by the canonical name.
+            index.setdefault(CLASS_INDEX.lookup(t["Class"]), set()).add(i)
+        class_tasks[year] = {c: frozenset(ids) for c, ids in index.items()}
+    return tasks, class_tasks
+
+
+def init_worker(data_dir, out_dir):
+    global TASKS, CLASS_TASKS, OUT_DIR
+    TASKS, CLASS_TASKS = build_index(Path(data_dir))
+    OUT_DIR = Path(out_dir)
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "student"
+
+
+def student_schedule(student: dict) -> list[dict]:
+    index = CLASS_TASKS.get(student["year"], {})
+    ids = set().union(*(index.get(c, frozenset()) for c in student["classes"]))
+    # Task positions follow the date-sorted order load_tasks() returns.
+    rows = TASKS.get(student["year"], [])
+    return [rows[i] for i in sorted(ids)]
+
+
+def run_batch(students: list[dict]) -> list[dict]:
+    summary = []
+    for s in students:
+        tasks = student_schedule(s)
+        clashes = find_clashes(tasks)
+        name = safe_name(s["student"])
+        with open(OUT_DIR / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump({**s, "tasks": tasks, "clashes": clashes}, f, indent=2, ensure_ascii=False)
+        with open(OUT_DIR / f"{name}.ics", "w", encoding="utf-8", newline="") as f:
+            f.write(to_ics(tasks, f"{s['student']} Assessments"))
+        summary.append({
+            "student": s["student"],
+            "year": s["year"],
+            "classes": ";".join(s["classes"]),
+            "tasks": len(tasks),
+            "clash_days": len(clashes),
+            "worst_day": max(clashes, key=lambda c: c["Count"])["Date"] if clashes else "",
+            "unmatched_classes": ";".join(s["unmatched"]),
+        })
+    return summary
+
+
+def generate(roster, out_dir, data_dir: Path = DATA_DIR, workers: int = None) -> list[dict]:
+    students = read_roster(roster)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Two students with the same cleaned-up name would overwrite each other's files,
+    # and on Windows and macOS names that differ only in case count as the same file.
+    seen = {}
+    for s in students:
+        name = safe_name(s["student"])
+        if name.lower() in seen:
+            raise ValueError(f"Students {seen[name.lower()]!r} and {s['student']!r} would share output file {name}")
+        seen[name.lower()] = s["student"]
+
+    # Roster names the normaliser couldn't place are kept as typed, and would otherwise just vanish
+    # from the timetable, so note every class with no tasks in the data.
+    _, class_tasks = build_index(data_dir)
+    for s in students:
+        known = class_tasks.get(s["year"], {})
+        s["unmatched"] = [c for c in s["classes"] if c not in known]
+    unmatched = sum(1 for s in students if s["unmatched"])
+
+    batches = [students[i:i + BATCH_SIZE] for i in range(0, len(students), BATCH_SIZE)]
+    t0 = time.perf_counter()
+    summary = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(str(data_dir), str(out_dir))) as pool:
+        for part in pool.map(run_batch, batches):
+            summary.extend(part)
+    took = time.perf_counter() - t0
+
+    with open(out_dir / "summary.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[
+            "student", "year", "classes", "tasks", "clash_days", "worst_day", "unmatched_classes",
+        ])
+        writer.writeheader()
+        writer.writerows(summary)
+
+    rate = len(students) / took if took else 0
+    print(f"Generated {len(students)} timetables in {took:.2f}s ({rate:.0f} students/s) into {out_dir}")
+    if unmatched:
+        print(f"{unmatched} student(s) have classes with no tasks in the data, see unmatched_classes in summary.csv")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Make a personalised calendar for every student on a roster.")
+    parser.add_argument("roster", help="CSV with student, year and classes (semicolon separated) columns")
+    parser.add_argument("-o", "--out", default="timetables", help="folder for the per-student exports")
+    parser.add_argument("-d", "--data", default=str(DATA_DIR), help="folder holding year11.json and year12.json")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+    generate(args.roster, args.out, Path(args.data), args.workers)
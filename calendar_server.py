@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from extractdata import Y11, Y12
+
+# Directories and File locations
+APP_DIR = Path(os.path.dirname(__file__))
+DATA_DIR = APP_DIR / "data"
+YEAR_FILES = {11: "year11.json", 12: "year12.json"}
+
+HOST = "127.0.0.1"
+PORT = 8011
+CACHE_LIMIT = 1024
+READ_TIMEOUT = 10
+
+
+def data_signature(data_dir: Path = DATA_DIR) -> tuple:
+    # Cheap check for whether the extractor has rewritten the files since last time.
+    sig = []
+    for name in YEAR_FILES.values():
+        try:
+            st = os.stat(data_dir / name)
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append((name, 0, 0))
+    return tuple(sig)
+
+
+def dataset_hash(data_dir: Path = DATA_DIR) -> str:
+    h = hashlib.sha1()
+    for name in YEAR_FILES.values():
+        path = data_dir / name
+        if path.exists():
+            h.update(path.read_bytes())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_tasks(year: int, data_dir: Path = DATA_DIR) -> list[dict]:
+    # Same fields as read_data() in the app, but as plain dicts so no pandas is needed per request.
+    cols = Y11 if year == 11 else Y12
+    path = data_dir / YEAR_FILES[year]
+    if not path.exists():
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    except Exception:
+        return []
+
+    tasks = []
+    for r in rows:
+        date = r.get("Date")
+        if not date:
+            continue
+        tasks.append({
+            "Date": date,
+            "Class": r.get(cols[0]) or "",
+            "Task": r.get(cols[1]) or "",
+            "Weighting": r.get(cols[2]) or "",
+            "Type": r.get(cols[3]) or "",
+            "Notes": r.get(cols[4]) or "",
+            "Events": r.get("Events") or "",
+        })
+    tasks.sort(key=lambda t: (t["Date"], t["Class"], t["Task"]))
+    return tasks
+
+
+def filter_tasks(tasks: list[dict], classes=None, start=None, end=None) -> list[dict]:
+    out = []
+    for t in tasks:
+        if classes and t["Class"] not in classes:
+            continue
+        # Dates are stored as yyyy-mm-dd so plain string comparison works.
+        if start and t["Date"] < start:
+            continue
+        if end and t["Date"] > end:
+            continue
+        out.append(t)
+    return out
+
+
+def find_clashes(tasks: list[dict], limit: int = 1) -> list[dict]:
+    # A clash is any date with more than `limit` assessments on it.
+    by_date = {}
+    for t in tasks:
+        by_date.setdefault(t["Date"], []).append(t)
+    out = []
+    for date, day in sorted(by_date.items()):
+        if len(day) > limit:
+            out.append({
+                "Date": date,
+                "Count": len(day),
+                "Classes": sorted({t["Class"] for t in day}),
+                "Tasks": [f"{t['Class']} — {t['Task']}" for t in day],
+            })
+    return out
+
+
+def ics_escape(text: str) -> str:
+    text = str(text)
+    for a, b in (("\\", "\\\\"), (";", "\\;"), (",", "\\,"), ("\n", "\\n")):
+        text = text.replace(a, b)
+    return text
+
+
+def ics_fold(line: str) -> str:
+    # RFC 5545 caps content lines at 75 octets; longer ones continue on lines starting with a space.
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        # Don't split a multi-byte character across two lines.
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        limit = 74
+    return "\r\n ".join(parts)
+
+
+def to_ics(tasks: list[dict], name: str = "Assessment Calendar") -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Assessment Calendar//EN",
+        f"X-WR-CALNAME:{ics_escape(name)}",
+    ]
+    seen = {}
+    for t in tasks:
+        try:
+            day = datetime.strptime(t["Date"], "%Y-%m-%d")
+        except ValueError:
+            continue
+        # The UID has to stay the same whatever else is in the feed, or subscribed
+        # calendars show duplicates. Only identical tasks get a counter to tell them apart.
+        key = f"{t['Date']}|{t['Class']}|{t['Task']}"
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        uid = hashlib.sha1((key if n == 0 else f"{key}|{n}").encode()).hexdigest()
+        desc = f"Type: {t['Type']}\nWeighting: {t['Weighting']}\nNotes: {t['Notes']}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@assessment-calendar",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{ics_escape(t['Class'] + ' — ' + t['Task'])}",
+            f"DESCRIPTION:{ics_escape(desc)}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(ics_fold(line) for line in lines) + "\r\n"
+
+
+class CalendarService:
+    """Read-only view of the extracted data with an in-memory response cache.
+
+    The cache and the dataset hash (used as the ETag) are dropped whenever the
+    year files change on disk, e.g. after the app re-runs the extractor.
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.signature = None
+        self.etag = ""
+        self.tasks = {}
+        self.cache = {}
+
+    def refresh(self):
+        sig = data_signature(self.data_dir)
+        if sig == self.signature:
+            return
+        self.signature = sig
+        self.etag = '"' + dataset_hash(self.data_dir) + '"'
+        self.tasks = {y: load_tasks(y, self.data_dir) for y in YEAR_FILES}
+        self.cache.clear()
+
+    def render(self, path: str, query: dict) -> tuple[int, str, bytes]:
+        parts = [p for p in path.split("/") if p]
+        if not parts:
+            body = {"years": sorted(YEAR_FILES), "hash": self.etag.strip('"')}
+            return 200, "application/json", json.dumps(body).encode()
+
+        if parts[0] != "year" or len(parts) < 2 or not parts[1].isdigit() or int(parts[1]) not in YEAR_FILES:
+            return 404, "application/json", b'{"error": "not found"}'
+
+        year = int(parts[1])
+        view = parts[2] if len(parts) > 2 else "tasks"
+        classes = set()
+        for c in query.get("class", []):
+            classes.update(x.strip() for x in c.split(",") if x.strip())
+        start = query.get("start", [None])[0]
+        end = query.get("end", [None])[0]
+        tasks = filter_tasks(self.tasks[year], classes, start, end)
+
+        if view == "tasks":
+            return 200, "application/json", json.dumps(tasks, ensure_ascii=False).encode()
+        if view == "classes":
+            names = sorted({t["Class"] for t in self.tasks[year] if t["Class"]})
+            return 200, "application/json", json.dumps(names, ensure_ascii=False).encode()
+        if view == "clashes":
+            return 200, "application/json", json.dumps(find_clashes(tasks), ensure_ascii=False).encode()
+        if view == "ics":
+            return 200, "text/calendar; charset=utf-8", to_ics(tasks, f"Year {year} Assessments").encode()
+        return 404, "application/json", b'{"error": "not found"}'
+
+    def respond(self, target: str, if_none_match: str = "") -> tuple[int, str, bytes, str]:
+        self.refresh()
+        url = urlsplit(target)
+        key = (url.path, url.query)
+        hit = self.cache.get(key)
+        if hit is None:
+            hit = self.render(url.path, parse_qs(url.query))
+            # Arbitrary query strings could grow the cache forever, so start over past a limit.
+            if len(self.cache) >= CACHE_LIMIT:
+                self.cache.clear()
+            self.cache[key] = hit
+        status, ctype, body = hit
+
+        # Only real data carries the ETag; errors are never "not modified".
+        if status != 200:
+            return status, ctype, body, ""
+        if etag_matches(if_none_match, self.etag):
+            return 304, "", b"", self.etag
+        return status, ctype, body, self.etag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match may be "*" or a comma separated list, with weak W/ tags allowed.
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or (tag and tag == etag):
+            return True
+    return False
+
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+async def handle(service: CalendarService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        # Don't let a client that connects and never sends anything hold its socket forever.
+        request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=READ_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        writer.close()
+        return
+
+    lines = request.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        status, ctype, body, etag = 400, "text/plain", b"bad request", ""
+    else:
+        if method not in ("GET", "HEAD"):
+            status, ctype, body, etag = 405, "text/plain", b"method not allowed", ""
+        else:
+            status, ctype, body, etag = service.respond(target, headers.get("if-none-match", ""))
+
+    head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    if ctype:
+        head.append(f"Content-Type: {ctype}")
+    if etag:
+        head.append(f"ETag: {etag}")
+    # A 304 has no body, and RFC 9110 only allows Content-Length on it if it matches the full response.
+    if status != 304:
+        head.append(f"Content-Length: {len(body)}")
+    head.append("Connection: close")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    if status != 304 and not lines[0].startswith("HEAD "):
+        writer.write(body)
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+async def serve(host: str = HOST, port: int = PORT, data_dir: Path = DATA_DIR):
+    service = CalendarService(data_dir)
+    service.refresh()
+    server = await asyncio.start_server(lambda r, w: handle(service, r, w), host, port, backlog=1024)
+    print(f"Serving assessment data on http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    try:
+        asyncio.run(serve(port=port))
+    except KeyboardInterrupt:
+        pass
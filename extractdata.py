@@ -1,10 +1,125 @@
 from pathlib import Path
+from collections import defaultdict
+from difflib import SequenceMatcher
+from contextlib import contextmanager, ExitStack
+from datetime import datetime
+from itertools import chain, islice
+import hashlib
+import json
+import os
+import tempfile
+import textwrap
+import time
+import openpyxl
 import pandas as pd
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 FIXED = ["Week", "Day", "Date", "Events"]
 Y11 = ["11 - Class", "11 - Task Name", "11 - Weighting", "11 - Task Type", "11 - Other Notes"]
 Y12 = ["12 - Class", "12 - Task Name", "12 - Weighting", "12 - Task Type", "12 - Other Notes"]
 
+# Canonical names, matching the drop-down lists on Sheet2 of the calendar workbook.
+CLASS_NAMES = [
+    "English", "Chemistry", "Essential Maths", "Maths Methods", "Specialist Maths",
+    "Psychology", "Textiles", "History", "IT", "Human Biology", "Exercise Science",
+    "Physics", "Design Tech", "Visual Arts", "Drama", "Music",
+]
+TASK_TYPES = ["Inclass Essay", "Essay", "Report", "Test", "Presentation", "Project", "Portfolio"]
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def same_word(a: str, b: str) -> bool:
+    # A typo ("excersice"), or an abbreviation of at least three letters ("spec", "bio").
+    if a == b:
+        return True
+    short, long = sorted((a, b), key=len)
+    if len(short) >= 3 and long.startswith(short):
+        return True
+    return min(len(a), len(b)) > 3 and SequenceMatcher(None, a, b).ratio() >= 0.7
+
+class NameIndex:
+    """Maps whatever a teacher typed to the closest canonical name.
+
+    Candidates come from trigram overlap (Dice score). A candidate is only
+    taken if every word on both sides pairs up with a word on the other,
+    allowing typos and abbreviations, and it clearly beats the runner-up.
+    Anything that doesn't match is kept as typed, so different courses stay
+    apart. Every raw spelling seen is remembered in ``aliases`` so it is only
+    scored once.
+
+    >>> ix = NameIndex(CLASS_NAMES)
+    >>> [ix.lookup(n) for n in ["Excersice Science", "Spec Maths", "Human Bio", "chemestry"]]
+    ['Exercise Science', 'Specialist Maths', 'Human Biology', 'Chemistry']
+    >>> [ix.lookup(n) for n in ["Maths", "English Literature", "Biology", "Music Theory"]]
+    ['Maths', 'English Literature', 'Biology', 'Music Theory']
+    >>> NameIndex(TASK_TYPES).lookup("in class essay")
+    'Inclass Essay'
+    """
+
+    def __init__(self, names: list[str], threshold: float = 0.5, margin: float = 0.1):
+        self.names = list(names)
+        self.threshold = threshold
+        self.margin = margin
+        self.grams = [trigrams(self.key(n)) for n in self.names]
+        self.words = [self.key(n).split() for n in self.names]
+        self.index = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for g in grams:
+                self.index[g].append(i)
+        self.aliases = {self.key(n): n for n in self.names}
+        # "in class essay" is the same as "Inclass Essay" once the spaces go.
+        self.aliases.update({self.key(n).replace(" ", ""): n for n in self.names})
+
+    @staticmethod
+    def key(raw: str) -> str:
+        return " ".join(str(raw).lower().split())
+
+    def words_match(self, words: list[str], i: int) -> bool:
+        canon = self.words[i]
+        return (all(any(same_word(w, c) for c in canon) for w in words)
+                and all(any(same_word(w, c) for w in words) for c in canon))
+
+    def lookup(self, raw: str) -> str:
+        key = self.key(raw)
+        hit = self.aliases.get(key, self.aliases.get(key.replace(" ", "")))
+        if hit is not None:
+            self.aliases[key] = hit
+            return hit
+
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for g in grams:
+            for i in self.index.get(g, ()):
+                shared[i] += 1
+        words = key.split()
+        scored = sorted(
+            ((2 * n / (len(grams) + len(self.grams[i])), i) for i, n in shared.items()),
+            reverse=True,
+        )
+        passing = [(score, i) for score, i in scored if score >= self.threshold and self.words_match(words, i)]
+
+        name = str(raw).strip()
+        if passing and (len(passing) == 1 or passing[0][0] - passing[1][0] >= self.margin):
+            name = self.names[passing[0][1]]
+        self.aliases[key] = name
+        return name
+
+    def normalise(self, col: pd.Series) -> pd.Series:
+        # Only look up each distinct spelling once, then map the whole column.
+        blank = col.isna() | (col.astype(str).str.strip() == "")
+        mapping = {v: self.lookup(v) for v in col[~blank].unique()}
+        return col.where(blank, col.map(mapping))
+
+CLASS_INDEX = NameIndex(CLASS_NAMES)
+TYPE_INDEX = NameIndex(TASK_TYPES)
+
 def find_header_row(raw: pd.DataFrame, max_scan: int = 20) -> int:
     target = [c.lower() for c in FIXED]
     for i in range(min(max_scan, len(raw))):
@@ -34,8 +149,288 @@ def remove_temp_rows(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     name = cols[0]
     return df[df[name] != "Select Class"].copy()
 
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+
+@contextmanager
+def data_lock(outdir, timeout: float = 30.0):
+    """Hold an exclusive lock on the data folder so only one writer runs at a time."""
+    out_dir = Path(outdir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / LOCK_FILE, "a+b") as f:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for lock on {out_dir}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def atomic_open(path):
+    """Open a temp file next to ``path`` for writing and rename it over the top on success.
+
+    Readers either see the old file or the new one, never half of one. If
+    anything goes wrong the temp file is removed and the old file is left alone.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstemp makes the file private, so give it the permissions a plain open() would.
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, path.stat().st_mode & 0o777 if path.exists() else 0o666 & ~umask)
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def atomic_write(path, data) -> str:
+    """Write ``data`` to ``path`` atomically and return its sha1."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with atomic_open(path) as f:
+        f.write(data)
+    return hashlib.sha1(data).hexdigest()
+
+def file_sha1(path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def read_manifest(outdir) -> dict:
+    try:
+        with open(Path(outdir) / MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def source_stamp(xlsx_path) -> dict:
+    st = os.stat(xlsx_path)
+    return {"path": str(Path(xlsx_path).resolve()), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def is_current(xlsx_path, outdir: str = "data") -> bool:
+    """True if the last good extraction came from this exact workbook and its files are intact."""
+    manifest = read_manifest(outdir)
+    try:
+        if manifest.get("source") != source_stamp(xlsx_path):
+            return False
+    except OSError:
+        return False
+    for name, digest in manifest.get("files", {}).items():
+        path = Path(outdir) / name
+        if not path.exists() or file_sha1(path) != digest:
+            return False
+    return bool(manifest.get("files"))
+
+def write_manifest(out_dir: Path, source: Path, names: list[str]):
+    # Written last, so a manifest always describes complete files.
+    manifest = {
+        "version": read_manifest(out_dir).get("version", 0) + 1,
+        "source": source_stamp(source),
+        "files": {n: file_sha1(out_dir / n) for n in names},
+    }
+    atomic_write(out_dir / MANIFEST, json.dumps(manifest, indent=2))
+
+# ---------------- Streaming extraction (xlsx) ----------------
+CHUNK_ROWS = 1000
+HEADER_SCAN = 20
+# Fixed names, since strftime("%a") follows the desktop locale once Qt has started.
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%y"]
+
+def is_blank(v) -> bool:
+    return v is None or str(v).strip() in ("", "nan", "nat")
+
+def cell_text(v):
+    # Match what pandas gives for dtype=str, so the JSON looks the same either way.
+    if v is None:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def resolve_date_cell(v: datetime, day, prev):
+    """Pick the right reading of a real Excel date cell.
+
+    The calendar is typed as dd/mm/yyyy, but Excel in a US locale turns
+    entries like 3/11/2025 into 11 March. When the day is 12 or less the
+    day and month could be either way round, so keep whichever reading
+    falls on the row's weekday, then whichever is nearest the previous
+    date in the sheet. If nothing settles it the cell is dropped, the
+    same as the pandas path does.
+    """
+    options = [v]
+    if v.day <= 12 and v.day != v.month:
+        options.append(v.replace(day=v.month, month=v.day))
+    if not is_blank(day):
+        options = [d for d in options if WEEKDAYS[d.weekday()] == str(day).strip()[:3].lower()]
+    if len(options) > 1 and prev:
+        ref = datetime.strptime(prev, "%Y-%m-%d")
+        options.sort(key=lambda d: abs(d - ref))
+        if abs(options[0] - ref) != abs(options[1] - ref):
+            options = options[:1]
+    return options[0].strftime("%Y-%m-%d") if len(options) == 1 else None
+
+def parse_date(v, seen: dict, day=None, prev=None):
+    if isinstance(v, datetime):
+        return resolve_date_cell(v, day, prev)
+    if is_blank(v):
+        return None
+    # Fill down repeats the same date string for every task that day, so remember each one.
+    text = str(v).strip()
+    if text not in seen:
+        out = None
+        for fmt in DATE_FORMATS:
+            try:
+                out = datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+                break
+            except ValueError:
+                pass
+        if out is None:
+            d = pd.to_datetime(text, dayfirst=True, errors="coerce")
+            out = None if pd.isna(d) else d.strftime("%Y-%m-%d")
+        seen[text] = out
+    return seen[text]
+
+def find_layout(rows: list) -> tuple:
+    """Find the header row in the first few rows of a sheet.
+
+    Returns (row number, {column name: position}) or (None, None) if the sheet
+    doesn't have every calendar column.
+    """
+    need = FIXED + Y11 + Y12
+    for i, row in enumerate(rows):
+        names = {str(v).strip(): j for j, v in enumerate(row) if v is not None}
+        if all(c in names for c in need):
+            return i, {c: names[c] for c in need}
+    return None, None
+
+def sheet_records(ws):
+    """Yield (year 11 record, year 12 record) for each row of a calendar sheet.
+
+    Rows are pulled from the worksheet a chunk at a time, so only one chunk
+    is ever held in memory. Either record is None when that half of the row
+    is a placeholder or empty.
+    """
+    rows = ws.iter_rows(values_only=True)
+    head = list(islice(rows, HEADER_SCAN))
+    hdr, pos = find_layout(head)
+    if hdr is None:
+        return
+    rows = chain(head[hdr + 1:], rows)
+
+    current = {c: None for c in FIXED}
+    seen_dates = {}
+    prev_date = None
+    for chunk in iter(lambda: list(islice(rows, CHUNK_ROWS)), []):
+        for row in chunk:
+            get = lambda c: row[pos[c]] if pos[c] < len(row) else None
+
+            # Merged cells only hold a value in the first row, so carry it down.
+            fixed = {}
+            for c in FIXED:
+                v = get(c)
+                if is_blank(v):
+                    v = current[c] if current[c] else v
+                else:
+                    current[c] = v
+                fixed[c] = v
+            fixed_out = {c: cell_text(fixed[c]) for c in FIXED}
+            fixed_out["Date"] = parse_date(fixed["Date"], seen_dates, fixed["Day"], prev_date)
+            prev_date = fixed_out["Date"] or prev_date
+
+            out = []
+            for cols in (Y11, Y12):
+                values = [get(c) for c in cols]
+                if values[0] == "Select Class" or all(is_blank(v) for v in values):
+                    out.append(None)
+                    continue
+                rec = dict(fixed_out)
+                rec.update({c: cell_text(v) for c, v in zip(cols, values)})
+                if not is_blank(values[0]):
+                    rec[cols[0]] = CLASS_INDEX.lookup(values[0])
+                if not is_blank(values[3]):
+                    rec[cols[3]] = TYPE_INDEX.lookup(values[3])
+                out.append(rec)
+            yield out[0], out[1]
+
+class JsonArrayWriter:
+    """Writes records into an open file as a JSON array, one at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+        self.f.write(b"[")
+
+    def write(self, rec: dict):
+        text = textwrap.indent(json.dumps(rec, indent=2), "  ")
+        self.f.write((",\n" if self.count else "\n").encode("utf-8") + text.encode("utf-8"))
+        self.count += 1
+
+    def close(self):
+        self.f.write(b"\n]" if self.count else b"]")
+
+def stream_extract_to_json(xlsx_path: str, outdir: str = "data"):
+    """Extract every calendar sheet in an xlsx workbook without loading it all into memory."""
+    path = Path(xlsx_path)
+    out_dir = Path(outdir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        with data_lock(out_dir), ExitStack() as stack:
+            w11 = JsonArrayWriter(stack.enter_context(atomic_open(out_dir / "year11.json")))
+            w12 = JsonArrayWriter(stack.enter_context(atomic_open(out_dir / "year12.json")))
+            sheets = 0
+            for ws in wb.worksheets:
+                matched = False
+                for r11, r12 in sheet_records(ws):
+                    matched = True
+                    if r11:
+                        w11.write(r11)
+                    if r12:
+                        w12.write(r12)
+                sheets += matched
+            if not sheets:
+                raise ValueError(f"No sheet in {path.name} has the calendar columns: {FIXED + Y11 + Y12}")
+            w11.close()
+            w12.close()
+            # Leaving the ExitStack renames both files into place before the manifest is written.
+            stack.close()
+            write_manifest(out_dir, path, ["year11.json", "year12.json"])
+    finally:
+        wb.close()
+
+    print(f"Extracted {w11.count} Year 11 and {w12.count} Year 12 tasks from {sheets} sheet(s)")
+
 def extract_to_json(xlsx_path: str, outdir: str = "data"):
     path = Path(xlsx_path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        return stream_extract_to_json(path, outdir)
+
+    # Older formats openpyxl can't read go through pandas, Sheet1 only.
     raw = pd.read_excel(path, sheet_name="Sheet1", header=None, dtype=str)
     hdr = find_header_row(raw)
     df = pd.read_excel(path, sheet_name="Sheet1", header=hdr, dtype=str)
@@ -58,6 +453,11 @@ def extract_to_json(xlsx_path: str, outdir: str = "data"):
     df11 = block(df11, Y11)
     df12 = block(df12, Y12)
 
+    # Tidy up the different ways teachers spell class names and task types.
+    for f, cols in ((df11, Y11), (df12, Y12)):
+        f[cols[0]] = CLASS_INDEX.normalise(f[cols[0]])
+        f[cols[3]] = TYPE_INDEX.normalise(f[cols[3]])
+
     out_dir = Path(outdir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -65,8 +465,10 @@ def extract_to_json(xlsx_path: str, outdir: str = "data"):
         if "Date" in f.columns:
             f["Date"] = pd.to_datetime(f["Date"], errors="coerce").dt.strftime("%Y-%m-%d")
 
-    df11.to_json(out_dir / "year11.json", orient="records", indent=2)
-    df12.to_json(out_dir / "year12.json", orient="records", indent=2)
+    with data_lock(out_dir):
+        atomic_write(out_dir / "year11.json", df11.to_json(orient="records", indent=2))
+        atomic_write(out_dir / "year12.json", df12.to_json(orient="records", indent=2))
+        write_manifest(out_dir, path, ["year11.json", "year12.json"])
 
     print(df11)
     print(df12)
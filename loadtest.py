@@ -0,0 +1,66 @@
+import asyncio
+import sys
+import time
+
+from calendar_server import HOST, PORT
+
+# A spread of the requests a class full of students would make.
+PATHS = [
+    "/year/11",
+    "/year/12",
+    "/year/11/classes",
+    "/year/11?class=IT,Maths%20Methods,Specialist%20Maths",
+    "/year/12?class=English&start=2025-10-01&end=2025-12-31",
+    "/year/11/clashes?class=IT,Maths%20Methods",
+    "/year/11/ics?class=IT",
+]
+
+
+async def fetch(path: str, etag: str = "") -> tuple[int, str]:
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    req = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+    if etag:
+        req += f"If-None-Match: {etag}\r\n"
+    writer.write((req + "\r\n").encode("latin-1"))
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+
+    head = data.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    tag = ""
+    for line in head[1:]:
+        if line.lower().startswith("etag:"):
+            tag = line.split(":", 1)[1].strip()
+    return status, tag
+
+
+async def client(n: int, results: list, conditional: bool):
+    etag = ""
+    for i in range(n):
+        path = PATHS[i % len(PATHS)]
+        t0 = time.perf_counter()
+        status, tag = await fetch(path, etag if conditional else "")
+        results.append((status, time.perf_counter() - t0))
+        etag = tag or etag
+
+
+async def main(clients: int, per_client: int, conditional: bool):
+    results = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(per_client, results, conditional) for _ in range(clients)))
+    took = time.perf_counter() - t0
+
+    lat = sorted(r[1] for r in results)
+    errors = sum(1 for s, _ in results if s not in (200, 304))
+    print(f"{len(results)} requests from {clients} clients in {took:.2f}s")
+    print(f"{len(results) / took:.0f} req/s, {errors} errors")
+    print(f"latency p50 {lat[len(lat) // 2] * 1000:.1f}ms  p99 {lat[int(len(lat) * 0.99)] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    # Usage: python loadtest.py [clients] [requests per client] [--etag]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    clients = int(args[0]) if args else 300
+    per_client = int(args[1]) if len(args) > 1 else 20
+    asyncio.run(main(clients, per_client, "--etag" in sys.argv))